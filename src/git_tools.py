@@ -1,28 +1,125 @@
 """Git operations for MCP PR analyzer."""
 import subprocess
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 
 
+# On-disk cache of get_file_changes results, shared across server processes
+DIFF_CACHE_DIR = Path.home() / ".cache" / "map_pr_analyzer" / "diffs"
+
+# Bump whenever the shape of get_file_changes results changes, so stale cache
+# entries written by older versions are never served
+_CACHE_FORMAT_VERSION = "3"
+
+# How many change analyses to keep in memory per analyzer, and on disk overall
+_MEMORY_CACHE_ENTRIES = 32
+_DISK_CACHE_ENTRIES = 128
+
+# Temp files older than this are left over from interrupted writes
+_STALE_TEMP_FILE_AGE_NS = 3600 * 10**9
+
+
 class GitAnalyzer:
     def __init__(self, repo_path: str = "."):
         self.repo_path = Path(repo_path).resolve()
+        self.cache_dir = DIFF_CACHE_DIR
+        self._changes_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._changes_cache_lock = threading.Lock()
+        # None until git itself has been asked, see _require_git_repo
+        self._is_repo: Optional[bool] = None
+    
+    def _find_git_dir(self) -> bool:
+        """
+        Check for a .git entry in the repo path or any of its parents, or for
+        the repo path being a git directory itself (as in bare repositories).
+        """
+        if any((path / ".git").exists() for path in (self.repo_path, *self.repo_path.parents)):
+            return True
+        return (self.repo_path / "HEAD").is_file() and (self.repo_path / "objects").is_dir()
+    
+    def _require_git_repo(self) -> None:
+        """Fail fast, without spawning git, when repo_path isn't inside a repository."""
+        if self._is_repo or self._find_git_dir():
+            self._is_repo = True
+            return
         
-    def _run_git_command(self, command: List[str]) -> str:
-        """Run a git command and return the output."""
+        # Setups like GIT_DIR/GIT_WORK_TREE leave nothing to find on disk, so
+        # ask git once and remember its answer
+        if self._is_repo is None:
+            try:
+                self._run_git_command(["rev-parse", "--git-dir"])
+                self._is_repo = True
+                return
+            except Exception:
+                self._is_repo = False
+        
+        raise Exception(f"Not a git repository: {self.repo_path}")
+    
+    def _run_git_command(self, command: List[str], binary: bool = False) -> Union[str, bytes]:
+        """Run a git command and return the output, as raw bytes if binary is set."""
         try:
             result = subprocess.run(
                 ["git"] + command,
                 cwd=self.repo_path,
                 capture_output=True,
-                text=True,
+                text=not binary,
                 check=True
             )
-            return result.stdout.strip()
+            return result.stdout if binary else result.stdout.strip()
         except subprocess.CalledProcessError as e:
-            raise Exception(f"Git command failed: {e.stderr}")
+            stderr = e.stderr.decode('utf-8', errors='replace') if binary else e.stderr
+            raise Exception(f"Git command failed: {stderr}")
+    
+    def _run_git_command_streaming(self, command: List[str], max_bytes: int) -> bytearray:
+        """
+        Run a git command, stopping it once its output exceeds max_bytes.
+        Returns the output read so far, which is at most max_bytes + 1 bytes
+        long; a longer result means git was stopped before it finished.
+        """
+        # Read one byte past the budget so we know whether git had more to say
+        limit = max_bytes + 1
+        buffer = bytearray()
+        size = 0
+        
+        with subprocess.Popen(
+            ["git"] + command,
+            cwd=self.repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=-1
+        ) as proc:
+            while size < limit:
+                # Grow geometrically so small diffs don't allocate the whole budget
+                if size == len(buffer):
+                    buffer.extend(bytes(min(max(len(buffer), 65536), limit - size)))
+                
+                with memoryview(buffer) as view:
+                    read = proc.stdout.readinto(view[size:limit])
+                if not read:
+                    break
+                size += read
+            
+            # Don't make git render the rest of a diff we won't show
+            overflowed = size > max_bytes
+            if overflowed:
+                proc.kill()
+            _, stderr = proc.communicate()
+        
+        if not overflowed and proc.returncode != 0:
+            raise Exception(f"Git command failed: {stderr.decode('utf-8', errors='replace')}")
+        
+        # Trim in place rather than copying the output out of the buffer
+        del buffer[size:]
+        return buffer
     
     def get_file_changes(self, target_branch: str = "main", max_tokens: int = 25000) -> Dict:
         """
@@ -30,49 +127,59 @@ class GitAnalyzer:
         Returns structured data about changes, respecting token limits.
         """
         try:
-            # Get list of changed files
-            changed_files = self._run_git_command([
-                "diff", "--name-status", f"{target_branch}...HEAD"
-            ]).split('\n')
-            
-            # Get diff stats
-            stats = self._run_git_command([
-                "diff", "--stat", f"{target_branch}...HEAD"
-            ])
-            
-            # Get the full diff
-            full_diff = self._run_git_command([
-                "diff", f"{target_branch}...HEAD"
-            ])
+            self._require_git_repo()
+            cache_key = self._changes_cache_key(target_branch, max_tokens)
+            cached = self._load_cached_changes(cache_key)
+            if cached is not None:
+                return cached
             
-            # Parse changed files
-            file_changes = []
-            for line in changed_files:
-                if line.strip():
-                    parts = line.split('\t')
-                    if len(parts) >= 2:
-                        status = parts[0]
-                        filename = parts[1]
-                        file_changes.append({
-                            "status": status,
-                            "filename": filename,
-                            "change_type": self._get_change_type(status)
-                        })
+            # The diffs are independent, so run them side by side
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                # Get changed files and per-file line counts in one pass
+                changed_files_future = executor.submit(self._run_git_command, [
+                    "diff", "--raw", "--numstat", "-z", f"{target_branch}...HEAD"
+                ], binary=True)
+                
+                # Get the diff, reading no more than fits in the token budget.
+                # Renames are already reported above, so skip git's rename
+                # detection, which scores every added file against every deleted one
+                max_chars = max(max_tokens - 2000, 0)  # Reserve space for metadata
+                diff_future = executor.submit(self._run_git_command_streaming, [
+                    "diff", "--no-renames", "--src-prefix=a/", "--dst-prefix=b/",
+                    f"{target_branch}...HEAD"
+                ], max_chars)
+                
+                # Count changed lines in the same rename-free view as the diff,
+                # where a renamed file shows up as a deletion plus an addition
+                shortstat_future = executor.submit(self._run_git_command, [
+                    "diff", "--no-renames", "--shortstat", f"{target_branch}...HEAD"
+                ])
+                
+                file_changes, stats = self._parse_raw_numstat(changed_files_future.result())
+                diff_bytes = diff_future.result()
+                changed_lines = self._count_changed_lines(shortstat_future.result())
             
             # Handle token limit
-            truncated_diff = self._truncate_diff(full_diff, max_tokens - 2000)  # Reserve space for metadata
+            truncated = len(diff_bytes) > max_chars
+            truncated_diff = self._truncate_diff(diff_bytes, max_chars, changed_lines).strip()
             
-            return {
+            result = {
                 "branch_comparison": f"{target_branch}...HEAD",
                 "total_files_changed": len(file_changes),
                 "file_changes": file_changes,
                 "diff_stats": stats,
                 "diff_content": truncated_diff,
-                "truncated": len(full_diff) > len(truncated_diff),
-                "original_diff_size": len(full_diff),
+                "truncated": truncated,
+                # git is stopped once the budget is exceeded, so for a
+                # truncated diff this is only a lower bound
+                "original_diff_size": len(diff_bytes),
+                "original_diff_size_exact": not truncated,
                 "change_summary": self._summarize_changes(file_changes)
             }
             
+            self._store_cached_changes(cache_key, result)
+            return result
+            
         except Exception as e:
             return {
                 "error": str(e),
@@ -84,6 +191,146 @@ class GitAnalyzer:
                 "truncated": False
             }
     
+    def _changes_cache_key(self, target_branch: str, max_tokens: int) -> str:
+        """
+        Build a cache key for get_file_changes.
+        The diff only depends on the commits on either side of the comparison,
+        so the resolved SHAs (including the merge base) identify it exactly.
+        """
+        revisions = self._run_git_command(["rev-parse", f"{target_branch}...HEAD"])
+        key_source = "\0".join([
+            _CACHE_FORMAT_VERSION, str(self.repo_path), target_branch, str(max_tokens), revisions
+        ])
+        return hashlib.blake2b(key_source.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _load_cached_changes(self, cache_key: str) -> Optional[Dict]:
+        """Look up cached change analysis in memory, then on disk."""
+        with self._changes_cache_lock:
+            if cache_key in self._changes_cache:
+                self._changes_cache.move_to_end(cache_key)
+                return self._changes_cache[cache_key]
+        
+        cache_file = self.cache_dir / f"{cache_key}.json"
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Mark the entry as recently used so pruning keeps it
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        
+        self._remember_changes(cache_key, cached)
+        return cached
+    
+    def _store_cached_changes(self, cache_key: str, changes: Dict) -> None:
+        """Remember change analysis in memory and, if possible, on disk."""
+        self._remember_changes(cache_key, changes)
+        
+        try:
+            # Entries hold full diff contents, so keep them private to the user
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            os.chmod(self.cache_dir, 0o700)
+            
+            # A unique temp file per writer, since threads sharing this analyzer
+            # may store the same key at once
+            fd, temp_file = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{cache_key}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(changes, f)
+                os.replace(temp_file, self.cache_dir / f"{cache_key}.json")
+            except BaseException:
+                os.unlink(temp_file)
+                raise
+            
+            self._prune_disk_cache()
+        except OSError:
+            # The disk cache is best effort; the in-memory copy still applies
+            pass
+    
+    def _remember_changes(self, cache_key: str, changes: Dict) -> None:
+        """Add change analysis to the in-memory cache, evicting the least recently used."""
+        with self._changes_cache_lock:
+            self._changes_cache[cache_key] = changes
+            self._changes_cache.move_to_end(cache_key)
+            while len(self._changes_cache) > _MEMORY_CACHE_ENTRIES:
+                self._changes_cache.popitem(last=False)
+    
+    def _prune_disk_cache(self) -> None:
+        """
+        Delete the least recently used on-disk entries beyond the size limit,
+        along with temp files left behind by writers that died mid-write.
+        """
+        entries = []
+        stale = []
+        stale_before = time.time_ns() - _STALE_TEMP_FILE_AGE_NS
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                try:
+                    mtime = entry.stat().st_mtime_ns
+                except OSError:
+                    continue
+                if entry.name.endswith('.json'):
+                    entries.append((mtime, entry.path))
+                elif entry.name.endswith('.tmp') and mtime < stale_before:
+                    stale.append(entry.path)
+        
+        entries.sort()
+        for path in stale + [path for _, path in entries[:-_DISK_CACHE_ENTRIES]]:
+            try:
+                os.unlink(path)
+            except OSError:
+                # Another process may have pruned it already
+                pass
+    
+    def _parse_raw_numstat(self, output: bytes) -> Tuple[List[Dict], str]:
+        """
+        Parse `git diff --raw --numstat -z` output into file changes.
+        Returns the file changes and a one-line summary of the line counts.
+        """
+        # -z leaves paths unquoted, so tolerate filenames that aren't valid UTF-8
+        fields = output.decode('utf-8', errors='replace').split('\0')
+        file_changes = []
+        position = 0
+        
+        # --raw records come first: ":<modes> <shas> <status>", then one
+        # path, or two for renames and copies
+        while position < len(fields) and fields[position].startswith(':'):
+            status = fields[position].rpartition(' ')[2]
+            file_changes.append({
+                "status": status,
+                "filename": fields[position + 1],
+                "change_type": self._get_change_type(status)
+            })
+            position += 3 if status[0] in 'RC' else 2
+        
+        # --numstat records follow in the same order: "<added>\t<deleted>\t<path>",
+        # with an empty path followed by two path fields for renames and copies
+        total_added = 0
+        total_deleted = 0
+        for change in file_changes:
+            added, deleted, path = fields[position].split('\t', 2)
+            position += 1 if path else 3
+            
+            # Binary files report "-" instead of line counts
+            change["additions"] = int(added) if added != '-' else None
+            change["deletions"] = int(deleted) if deleted != '-' else None
+            total_added += change["additions"] or 0
+            total_deleted += change["deletions"] or 0
+        
+        stats = (
+            f"{len(file_changes)} files changed, "
+            f"{total_added} insertions(+), {total_deleted} deletions(-)"
+        )
+        return file_changes, stats
+    
+    def _count_changed_lines(self, shortstat: str) -> int:
+        """Total the insertions and deletions in `git diff --shortstat` output."""
+        return sum(int(count) for count in re.findall(r"(\d+) (?:insertion|deletion)", shortstat))
+    
     def _get_change_type(self, status: str) -> str:
         """Convert git status to human-readable change type."""
         status_map = {
@@ -96,89 +343,91 @@ class GitAnalyzer:
         }
         return status_map.get(status[0], 'unknown')
     
-    def _truncate_diff(self, diff: str, max_chars: int) -> str:
-        """Truncate diff to fit within token limits while preserving structure."""
+    def _truncate_diff(self, diff: bytearray, max_chars: int, changed_lines: int = 0) -> str:
+        """
+        Truncate diff to fit within token limits while preserving structure,
+        decoding only the part that is kept.
+        changed_lines is the diff's total of added and deleted lines, used to
+        report how many of them were cut.
+        """
         if len(diff) <= max_chars:
-            return diff
+            return diff.decode('utf-8', errors='replace')
         
-        # Try to truncate at file boundaries
-        lines = diff.split('\n')
-        truncated_lines = []
-        current_size = 0
+        # Cut at the last line boundary inside the budget
+        cut = diff.rfind(b'\n', 0, max_chars)
+        if cut < 0:
+            cut = max_chars
         
-        for line in lines:
-            line_size = len(line) + 1  # +1 for newline
-            if current_size + line_size > max_chars:
-                truncated_lines.append(f"\n... [DIFF TRUNCATED - {len(lines) - len(truncated_lines)} more lines] ...")
-                break
-            truncated_lines.append(line)
-            current_size += line_size
+        # Count the +/- lines we kept, excluding the ---/+++ file headers
+        # (get_file_changes pins the a/ and b/ prefixes they use)
+        headers = sum(
+            diff.count(header, 0, cut)
+            for header in (b'\n--- a/', b'\n--- /dev/null', b'\n+++ b/', b'\n+++ /dev/null')
+        )
+        kept_changed = diff.count(b'\n+', 0, cut) + diff.count(b'\n-', 0, cut) - headers
+        remaining = max(changed_lines - kept_changed, 0)
         
-        return '\n'.join(truncated_lines)
+        with memoryview(diff) as view:
+            kept = str(view[:cut], 'utf-8', 'replace')
+        return kept + f"\n... [DIFF TRUNCATED - {remaining} more changed lines] ..."
     
     def _summarize_changes(self, file_changes: List[Dict]) -> Dict:
         """Create a high-level summary of changes."""
-        summary = {
-            "added": 0,
-            "modified": 0,
-            "deleted": 0,
-            "renamed": 0,
-            "file_types": {},
-            "directories": set()
-        }
+        filenames = [change["filename"] for change in file_changes]
+        change_types = Counter(change["change_type"] for change in file_changes)
+        directories = Counter(
+            name[:slash] for name in filenames if (slash := name.rfind('/')) > 0
+        ).most_common()
         
-        for change in file_changes:
-            change_type = change["change_type"]
-            filename = change["filename"]
-            
-            # Count by change type
-            if change_type in summary:
-                summary[change_type] += 1
-            
+        return {
+            "added": change_types["added"],
+            "modified": change_types["modified"],
+            "deleted": change_types["deleted"],
+            "renamed": change_types["renamed"],
             # Track file extensions
-            if '.' in filename:
-                ext = filename.split('.')[-1]
-                summary["file_types"][ext] = summary["file_types"].get(ext, 0) + 1
-            
-            # Track directories
-            directory = os.path.dirname(filename)
-            if directory:
-                summary["directories"].add(directory)
-        
-        # Convert set to list for JSON serialization
-        summary["directories"] = list(summary["directories"])
-        
-        return summary
+            "file_types": dict(Counter(
+                name.rpartition('.')[2] for name in filenames if '.' in name
+            )),
+            # Track directories, busiest first
+            "directories": [directory for directory, _ in directories],
+            "directory_counts": dict(directories)
+        }
     
     def get_commit_messages(self, target_branch: str = "main", limit: int = 10) -> List[Dict]:
         """Get recent commit messages for context."""
         try:
+            self._require_git_repo()
+            # Unit (\x1f) and record (\x1e) separators can't appear in commit metadata
             log_output = self._run_git_command([
-                "log", f"{target_branch}...HEAD", 
-                "--pretty=format:%H|%s|%an|%ad", 
+                "log", f"--max-count={limit}",
+                "--pretty=format:%H%x1f%s%x1f%an%x1f%ad%x1e",
                 "--date=short",
-                f"-{limit}"
+                f"{target_branch}...HEAD"
             ])
             
-            commits = []
-            for line in log_output.split('\n'):
-                if line.strip():
-                    parts = line.split('|')
-                    if len(parts) >= 4:
-                        commits.append({
-                            "hash": parts[0],
-                            "message": parts[1],
-                            "author": parts[2],
-                            "date": parts[3]
-                        })
-            
-            return commits
+            return list(self._iter_commits(log_output))
         except Exception as e:
             return [{"error": str(e)}]
     
+    def _iter_commits(self, log_output: str) -> Iterator[Dict]:
+        """Yield commits from `git log` output in the get_commit_messages format."""
+        for record in log_output.split('\x1e'):
+            record = record.lstrip('\n')
+            if not record:
+                continue
+            
+            commit_hash, message, author, date = record.split('\x1f', 3)
+            yield {
+                "hash": commit_hash,
+                "message": message,
+                "author": author,
+                "date": date
+            }
+    
     def get_branch_info(self) -> Dict:
         """Get current branch information."""
         try:
+            self._require_git_repo()
             current_branch = self._run_git_command(["branch", "--show-current"])
             remote_branches = self._run_git_command(["branch", "-r"]).split('\n')
             
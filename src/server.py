@@ -2,8 +2,10 @@
 
 from fastmcp import FastMCP
 from typing import Dict, Optional
+import functools
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from git_tools import GitAnalyzer
@@ -13,10 +15,15 @@ from templates import TemplateManager
 mcp = FastMCP("PR Template Analyzer")
 
 # Initialize components
-git_analyzer = GitAnalyzer()
 template_manager = TemplateManager()
 
 
+@functools.lru_cache(maxsize=16)
+def _get_git_analyzer(repo_path: str = ".") -> GitAnalyzer:
+    """Get the shared GitAnalyzer for a repository path."""
+    return GitAnalyzer(repo_path)
+
+
 @mcp.tool()
 def analyze_file_changes(
     target_branch: str = "main", 
@@ -38,17 +45,23 @@ def analyze_file_changes(
         max_tokens: Maximum tokens for diff content (default: 25000)
     """
     try:
-        # Update git analyzer path if needed
-        if repo_path != ".":
-            global git_analyzer
-            git_analyzer = GitAnalyzer(repo_path)
-        
-        # Get comprehensive change analysis
-        changes = git_analyzer.get_file_changes(target_branch, max_tokens)
+        git_analyzer = _get_git_analyzer(repo_path)
         
-        # Add additional context
-        branch_info = git_analyzer.get_branch_info()
-        commit_messages = git_analyzer.get_commit_messages(target_branch, limit=5)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Get comprehensive change analysis
+            changes_future = executor.submit(
+                git_analyzer.get_file_changes, target_branch, max_tokens
+            )
+            
+            # Add additional context
+            branch_info_future = executor.submit(git_analyzer.get_branch_info)
+            commit_messages_future = executor.submit(
+                git_analyzer.get_commit_messages, target_branch, limit=5
+            )
+            
+            changes = changes_future.result()
+            branch_info = branch_info_future.result()
+            commit_messages = commit_messages_future.result()
         
         # Combine all data
         result = {
@@ -176,10 +189,15 @@ def suggest_template(
 # Additional utility tools
 
 @mcp.tool()
-def get_git_status() -> Dict:
-    """Get current git repository status and branch information."""
+def get_git_status(repo_path: str = ".") -> Dict:
+    """
+    Get current git repository status and branch information.
+    
+    Args:
+        repo_path: Path to git repository (default: current directory)
+    """
     try:
-        branch_info = git_analyzer.get_branch_info()
+        branch_info = _get_git_analyzer(repo_path).get_branch_info()
         return {
             "status": "success",
             **branch_info
@@ -1,12 +1,70 @@
 """PR template management for MCP server."""
 
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+
+# Keywords hinting at the kind of change, matched anywhere in the change text
+_FIX_RE = re.compile(r"fix|bug|error|issue", re.IGNORECASE)
+_HOTFIX_RE = re.compile(r"critical|urgent|hotfix|production", re.IGNORECASE)
+
+# Metadata for the bundled templates, shared by every TemplateManager
+_TEMPLATE_METADATA: Mapping[str, Dict] = MappingProxyType({
+    "feature": {
+        "name": "Feature",
+        "description": "For new features and enhancements",
+        "suitable_for": (
+            "New functionality",
+            "Feature enhancements",
+            "New API endpoints",
+            "UI/UX improvements"
+        )
+    },
+    "bugfix": {
+        "name": "Bug Fix",
+        "description": "For fixing bugs and issues",
+        "suitable_for": (
+            "Bug fixes",
+            "Error handling improvements",
+            "Performance fixes",
+            "Security fixes"
+        )
+    },
+    "hotfix": {
+        "name": "Hotfix",
+        "description": "For critical production issues",
+        "suitable_for": (
+            "Critical production bugs",
+            "Security vulnerabilities",
+            "Service outages",
+            "Data corruption fixes"
+        )
+    },
+    "docs": {
+        "name": "Documentation",
+        "description": "For documentation changes",
+        "suitable_for": (
+            "README updates",
+            "API documentation",
+            "Code comments",
+            "Architecture docs"
+        )
+    }
+})
 
 
 class TemplateManager:
+    # Filename classification tables for get_template_suggestions
+    DOC_EXTENSIONS = frozenset({"md", "txt", "rst"})
+    CONFIG_EXTENSIONS = frozenset({"json", "yaml", "yml", "toml", "ini"})
+    TEST_PREFIXES = ("test_", "spec_")
+    TEST_SUFFIXES = ("_test", "_spec")
+    
     def __init__(self, templates_dir: str = None):
         if templates_dir is None:
             # Get the directory where this script is located
@@ -22,84 +80,90 @@ class TemplateManager:
             except (OSError, PermissionError):
                 # If we can't create it, just use the path as-is
                 pass
+        
+        # Loaded templates, invalidated when the directory or any template changes
+        self._cache: Optional[Dict[str, Dict]] = None
+        self._cache_signature: Optional[Tuple] = None
     
     def get_all_templates(self) -> Dict[str, Dict]:
         """Get all available PR templates with metadata."""
-        templates = {}
-        
-        # Define template metadata
-        template_metadata = {
-            "feature": {
-                "name": "Feature",
-                "description": "For new features and enhancements",
-                "suitable_for": [
-                    "New functionality",
-                    "Feature enhancements",
-                    "New API endpoints",
-                    "UI/UX improvements"
-                ]
-            },
-            "bugfix": {
-                "name": "Bug Fix",
-                "description": "For fixing bugs and issues",
-                "suitable_for": [
-                    "Bug fixes",
-                    "Error handling improvements",
-                    "Performance fixes",
-                    "Security fixes"
-                ]
-            },
-            "hotfix": {
-                "name": "Hotfix",
-                "description": "For critical production issues",
-                "suitable_for": [
-                    "Critical production bugs",
-                    "Security vulnerabilities",
-                    "Service outages",
-                    "Data corruption fixes"
-                ]
-            },
-            "docs": {
-                "name": "Documentation",
-                "description": "For documentation changes",
-                "suitable_for": [
-                    "README updates",
-                    "API documentation",
-                    "Code comments",
-                    "Architecture docs"
-                ]
-            }
-        }
+        entries = self._template_entries()
+        signature = self._templates_signature(entries)
+        if self._cache is not None and signature == self._cache_signature:
+            return self._cache
         
-        # Load template files
-        for template_file in self.templates_dir.glob("*.md"):
-            template_name = template_file.stem
-            
-            try:
-                with open(template_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                templates[template_name] = {
-                    "content": content,
-                    "file_path": str(template_file),
-                    "metadata": template_metadata.get(template_name, {
-                        "name": template_name.title(),
-                        "description": f"Template for {template_name}",
-                        "suitable_for": []
-                    })
-                }
-            except Exception as e:
-                templates[template_name] = {
-                    "error": f"Could not load template: {str(e)}",
-                    "file_path": str(template_file)
-                }
+        # Load template files, reading them in parallel when there are several
+        if len(entries) > 2:
+            with ThreadPoolExecutor(max_workers=min(8, len(entries))) as executor:
+                templates = dict(executor.map(self._load_template, entries))
+        else:
+            templates = dict(map(self._load_template, entries))
         
+        self._cache = templates
+        self._cache_signature = signature
         return templates
     
+    def _templates_signature(self, entries: List[os.DirEntry]) -> Tuple:
+        """
+        Modification times and sizes of the templates directory and its
+        template files, used to validate the cache.
+        """
+        try:
+            directory_mtime = self.templates_dir.stat().st_mtime_ns
+        except OSError:
+            directory_mtime = -1
+        
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        
+        return directory_mtime, tuple(sorted(files))
+    
+    def _load_template(self, entry: os.DirEntry) -> Tuple[str, Dict]:
+        """Read one template file and attach its metadata."""
+        template_name = entry.name[:-3]
+        
+        try:
+            with open(entry.path, 'rb') as f:
+                content = f.read().decode('utf-8')
+            
+            return template_name, {
+                "content": content,
+                "file_path": entry.path,
+                "metadata": self._template_metadata(template_name)
+            }
+        except Exception as e:
+            return template_name, {
+                "error": f"Could not load template: {str(e)}",
+                "file_path": entry.path
+            }
+    
+    def _template_metadata(self, template_name: str) -> Dict:
+        """Get a template's metadata as a fresh copy, so callers can't alter the shared defaults."""
+        metadata = _TEMPLATE_METADATA.get(template_name)
+        if metadata is None:
+            return {
+                "name": template_name.title(),
+                "description": f"Template for {template_name}",
+                "suitable_for": []
+            }
+        return {**metadata, "suitable_for": list(metadata["suitable_for"])}
+    
+    def _template_entries(self) -> List[os.DirEntry]:
+        """List the template files in the templates directory."""
+        try:
+            with os.scandir(self.templates_dir) as entries:
+                return [e for e in entries if e.name.endswith('.md') and e.is_file()]
+        except OSError:
+            return []
+    
     def get_template(self, template_name: str) -> Optional[Dict]:
         """Get a specific template by name."""
-        templates = self.get_all_templates()
-        return templates.get(template_name)
+        return self.get_all_templates().get(template_name)
     
     def get_template_suggestions(self, change_analysis: Dict) -> Dict:
         """
@@ -124,12 +188,17 @@ class TemplateManager:
         
         for change in file_changes:
             filename = change.get("filename", "").lower()
+            basename = filename.rpartition('/')[2]
+            stem, dot, ext = basename.rpartition('.')
+            if not dot:
+                stem, ext = basename, ""
             
-            if any(doc_ext in filename for doc_ext in ['.md', '.txt', '.rst', 'readme', 'docs/']):
+            if ext in self.DOC_EXTENSIONS or "readme" in filename or "docs/" in filename:
                 doc_files += 1
-            elif any(test_ext in filename for test_ext in ['test_', '_test', 'spec_', '_spec', 'tests/']):
+            elif (basename.startswith(self.TEST_PREFIXES) or stem.endswith(self.TEST_SUFFIXES)
+                  or "tests/" in filename):
                 test_files += 1
-            elif any(config_ext in filename for config_ext in ['.json', '.yaml', '.yml', '.toml', '.ini', 'config']):
+            elif ext in self.CONFIG_EXTENSIONS or "config" in filename:
                 config_files += 1
             else:
                 code_files += 1
@@ -142,10 +211,10 @@ class TemplateManager:
         elif doc_files > code_files:
             suggestions["primary_suggestions"] = ["docs"]
             suggestions["secondary_suggestions"] = ["feature"]
-        elif any(word in str(change_analysis).lower() for word in ["fix", "bug", "error", "issue"]):
+        elif _FIX_RE.search(change_text := self._change_text(change_analysis)):
             suggestions["primary_suggestions"] = ["bugfix"]
             suggestions["secondary_suggestions"] = ["feature"]
-        elif any(word in str(change_analysis).lower() for word in ["critical", "urgent", "hotfix", "production"]):
+        elif _HOTFIX_RE.search(change_text):
             suggestions["primary_suggestions"] = ["hotfix"]
             suggestions["secondary_suggestions"] = ["bugfix"]
         else:
@@ -158,12 +227,30 @@ class TemplateManager:
         
         return suggestions
     
+    def _change_text(self, change_analysis: Dict) -> str:
+        """Collect the free text of a change analysis for keyword matching."""
+        parts = [change_analysis.get("diff_content"), change_analysis.get("error")]
+        for change in change_analysis.get("file_changes") or []:
+            if isinstance(change, dict):
+                parts.append(change.get("filename"))
+        for commit in change_analysis.get("recent_commits") or []:
+            if isinstance(commit, dict):
+                parts.append(commit.get("message"))
+        
+        branch_info = change_analysis.get("branch_info")
+        if isinstance(branch_info, dict):
+            parts.append(branch_info.get("current_branch"))
+        
+        # Caller-supplied analyses may hold nulls or other non-text values
+        return "\n".join(part for part in parts if isinstance(part, str))
+    
     def create_custom_template(self, name: str, content: str) -> bool:
         """Create a new custom template."""
         try:
             template_path = self.templates_dir / f"{name}.md"
             with open(template_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            self._cache = None
             return True
         except Exception as e:
             print(f"Error creating template {name}: {e}")
@@ -171,4 +258,9 @@ class TemplateManager:
     
     def list_available_templates(self) -> List[str]:
         """Get a simple list of available template names."""
-        return list(self.get_all_templates().keys())
\ No newline at end of file
+        # Reuse loaded templates when they're current, otherwise just list the
+        # directory rather than reading every file
+        entries = self._template_entries()
+        if self._cache is not None and self._templates_signature(entries) == self._cache_signature:
+            return list(self._cache.keys())
+        return [entry.name[:-3] for entry in entries]
\ No newline at end of file